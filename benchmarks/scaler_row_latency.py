@@ -0,0 +1,50 @@
+##
+## Copyright 2024 Zest AI All Rights Reserved
+##
+##
+##
+## It is prohibited to copy, in whole or in part, modify, directly or indirectly reverse engineer, disassemble, decompile, decode or adapt this code or any portion or aspect thereof, or otherwise attempt to derive or gain access to any part of the source code or algorithms contained herein as provided in your ZAML agreement.
+##
+"""Single-row latency of ZamlScaler.transform against the compiled ZamlScaler.transform_row
+
+Run with:
+    python benchmarks/scaler_row_latency.py
+"""
+import argparse
+import timeit
+
+import numpy as np
+
+from ztestdata.datasets import ZamlScaler
+
+
+def bench(scaler_type, engine, n_features, repeat):
+    x = np.random.randn(10000, n_features)
+    scaler = ZamlScaler(cat_cols=[[0, 1]], scaler_type=scaler_type, engine=engine)
+    scaler.fit_transform(x)
+    scaler.compile_row()
+    row = x[0]
+    assert np.array_equal(scaler.transform(row)[0], scaler.transform_row(row))
+
+    transform = min(timeit.repeat(lambda: scaler.transform(row), number=repeat, repeat=5)) / repeat
+    transform_row = min(timeit.repeat(lambda: scaler.transform_row(row), number=repeat, repeat=5)) / repeat
+    return transform * 1e6, transform_row * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--n-features', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args()
+
+    print('{:<12s} {:<8s} {:>14s} {:>16s} {:>8s}'.format(
+        'scaler', 'engine', 'transform(us)', 'transform_row(us)', 'speedup'))
+    for scaler_type in ['identity', 'standardize', 'robust', 'normalize']:
+        for engine in ['sklearn', 'numpy']:
+            transform, transform_row = bench(scaler_type, engine, args.n_features, args.repeat)
+            print('{:<12s} {:<8s} {:>14.2f} {:>16.2f} {:>7.0f}x'.format(
+                scaler_type, engine, transform, transform_row, transform / transform_row))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+##
+## Copyright 2024 Zest AI All Rights Reserved
+##
+##
+##
+## It is prohibited to copy, in whole or in part, modify, directly or indirectly reverse engineer, disassemble, decompile, decode or adapt this code or any portion or aspect thereof, or otherwise attempt to derive or gain access to any part of the source code or algorithms contained herein as provided in your ZAML agreement.
+##
+"""Throughput of ZamlScaler.transform with the sklearn engine against the numpy engine
+
+Run with:
+    python benchmarks/scaler_throughput.py --n-rows 10000000 --n-jobs 1
+"""
+import argparse
+import timeit
+
+import numpy as np
+
+from ztestdata.datasets import ZamlScaler
+
+
+def bench(scaler_type, engine, x, n_jobs, repeat):
+    scaler = ZamlScaler(cat_cols=[[0, 1]], scaler_type=scaler_type, engine=engine, n_jobs=n_jobs)
+    scaler.fit_transform(x)
+    return min(timeit.repeat(lambda: scaler.transform(x), number=1, repeat=repeat))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--n-rows', type=int, default=10000000)
+    parser.add_argument('--n-features', type=int, default=8)
+    parser.add_argument('--n-jobs', type=int, default=None)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    x = np.random.randn(args.n_rows, args.n_features).astype(np.float32)
+    print('{:<12s} {:>12s} {:>12s} {:>8s}'.format('scaler', 'sklearn(s)', 'numpy(s)', 'speedup'))
+    for scaler_type in ['identity', 'standardize', 'robust', 'normalize']:
+        sklearn, numpy = [bench(scaler_type, engine, x, args.n_jobs, args.repeat) for engine in ['sklearn', 'numpy']]
+        print('{:<12s} {:>12.2f} {:>12.2f} {:>7.1f}x'.format(scaler_type, sklearn, numpy, sklearn / numpy))
+
+
+if __name__ == '__main__':
+    main()
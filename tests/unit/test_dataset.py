@@ -0,0 +1,83 @@
+#
+# Copyright 2024 Zest AI All Rights Reserved
+#
+#
+#
+# It is prohibited to copy, in whole or in part, modify, directly or
+# indirectly reverse engineer, disassemble, decompile, decode or adapt
+# this code or any portion or aspect thereof, or otherwise attempt to
+# derive or gain access to any part of the source code or algorithms
+# contained herein as provided in your ZAML agreement.
+#
+import numpy as np
+import pandas as pd
+import pytest
+
+from ztestdata.datasets import Dataset
+from ztestdata.datasets.dataset import BLOCK_SIZE
+
+# rows of the generated datasets cross a block of the random streams
+N = BLOCK_SIZE + 1000
+SELECTIONS = [
+    # (rows, columns) of the handle, then rows and columns of the full arrays
+    ((slice(None), slice(None)), slice(None), slice(None)),
+    ((slice(100, 2000), [1, 0]), slice(100, 2000), [1, 0]),
+    ((slice(BLOCK_SIZE - 10, BLOCK_SIZE + 10), slice(None)), slice(BLOCK_SIZE - 10, BLOCK_SIZE + 10), slice(None)),
+    ((slice(-300, None), -1), slice(-300, None), [-1]),
+    ((slice(-300, -100), [-2, 0, -2]), slice(-300, -100), [-2, 0, -2]),
+    ((slice(10, 10), slice(None)), slice(10, 10), slice(None)),
+    ((slice(50, 10), [0]), slice(50, 10), [0]),
+]
+
+
+def select(data, rows, columns=None):
+    if isinstance(data, (pd.DataFrame, pd.Series)):
+        data = data.iloc[rows]
+        return data if columns is None else data.iloc[:, columns]
+    data = data[rows]
+    return data if columns is None else data[:, columns]
+
+
+def assert_equal(result, expected):
+    if isinstance(expected, pd.DataFrame):
+        pd.testing.assert_frame_equal(result, expected)
+    elif isinstance(expected, pd.Series):
+        pd.testing.assert_series_equal(result, expected)
+    else:
+        np.testing.assert_array_equal(result, expected)
+
+
+GENERATED = ['max', 'simple', 'xor', 'correlated', 'mv_gate']
+DATASETS = (
+    [pytest.param(name, {'N': N, 'noise_dim': 3}, id=name) for name in GENERATED]
+    + [pytest.param(name, {'N': 2000}, id=name) for name in ['ring', 'moons']]
+    + [pytest.param('boston', {}, id='boston')])
+
+
+@pytest.mark.parametrize('name,params', DATASETS)
+@pytest.mark.parametrize('key,rows,columns', SELECTIONS)
+def test_dataset_selection_matches_full_data(name, params, key, rows, columns):
+    full = Dataset(name, random_state=0, **params)
+    dataset = Dataset(name, random_state=0, **params)[key]
+    assert_equal(dataset.x, select(full.x, rows, columns))
+    assert_equal(dataset.y, select(full.y, rows))
+    assert dataset.shape == select(full.x, rows, columns).shape
+
+
+@pytest.mark.parametrize('name,params', DATASETS)
+def test_dataset_chained_selection(name, params):
+    full = Dataset(name, random_state=0, **params)
+    dataset = full[100:400, ::-1][10:-10, [-1, 1]][5:]
+    columns = np.arange(full.n_columns)[::-1][[-1, 1]]
+    assert_equal(dataset.x, select(full.x, slice(115, 390), columns))
+    assert_equal(dataset.y, select(full.y, slice(115, 390)))
+
+
+@pytest.mark.parametrize('name', ['max', 'correlated', 'mv_gate'])
+def test_dataset_noise_columns(name):
+    full = Dataset(name, random_state=0, N=N, noise_dim=4)
+    n_signal = full.n_columns - 4
+    dataset = full[BLOCK_SIZE - 50:, n_signal:]
+    assert dataset.shape == (1050, 4)
+    np.testing.assert_array_equal(dataset.x, full.x[BLOCK_SIZE - 50:, n_signal:])
+    np.testing.assert_array_equal(dataset.y, full.y[BLOCK_SIZE - 50:])
@@ -0,0 +1,85 @@
+#
+# Copyright 2024 Zest AI All Rights Reserved
+#
+#
+#
+# It is prohibited to copy, in whole or in part, modify, directly or
+# indirectly reverse engineer, disassemble, decompile, decode or adapt
+# this code or any portion or aspect thereof, or otherwise attempt to
+# derive or gain access to any part of the source code or algorithms
+# contained herein as provided in your ZAML agreement.
+#
+import numpy as np
+import pandas as pd
+import pytest
+
+from ztestdata.datasets.feature_engineering import GOOD_VAR, fe, fe_chunked
+
+
+def loan_stats(n, loan_status=('Fully Paid', 'Charged Off'), seed=0):
+    """Small LoanStats-like raw frame"""
+    rng = np.random.default_rng(seed)
+    months = pd.date_range('2007-06-01', '2011-12-01', freq='MS')
+    df = pd.DataFrame({
+        'loan_status': rng.choice(loan_status, n),
+        'loan_amnt': rng.integers(1000, 35000, n).astype(float),
+        'term': rng.choice([' 36 months', ' 60 months'], n),
+        'int_rate': ['{:.2f}%'.format(v) for v in rng.uniform(5, 25, n)],
+        'installment': rng.uniform(30, 1000, n).round(2),
+        'emp_length': rng.choice(['< 1 year', '5 years', '10+ years', 'n/a'], n),
+        'home_ownership': rng.choice(['RENT', 'OWN', 'MORTGAGE'], n),
+        'annual_inc': rng.uniform(1e4, 2e5, n).round(2),
+        'verification_status': rng.choice(['Verified', 'Not Verified'], n),
+        'issue_d': pd.DatetimeIndex(rng.choice(months, n)).strftime('%b-%y'),
+        'purpose': rng.choice(['debt_consolidation', 'credit_card', 'moving', 'car'], n),
+        'addr_state': 'CA',
+        'dti': rng.uniform(0, 30, n).round(2),
+        'delinq_2yrs': rng.integers(0, 3, n).astype(float),
+        'earliest_cr_line': pd.DatetimeIndex(rng.choice(months - pd.DateOffset(years=10), n)).strftime('%b-%y'),
+        'inq_last_6mths': rng.integers(0, 5, n).astype(float),
+        'mths_since_last_delinq': np.where(rng.random(n) < .5, np.nan, rng.integers(0, 100, n)),
+        'mths_since_last_record': np.where(rng.random(n) < .8, np.nan, rng.integers(0, 100, n)),
+        'open_acc': rng.integers(1, 30, n).astype(float),
+        'pub_rec': rng.integers(0, 2, n).astype(float),
+        'revol_bal': rng.uniform(0, 5e4, n).round(2),
+        'next_pymnt_d': np.nan,
+        'last_credit_pull_d': 'Jan-16',
+        'pub_rec_bankruptcies': rng.integers(0, 2, n).astype(float)})
+    return df.loc[:, GOOD_VAR.keys()]
+
+
+def sorted_rows(df, target):
+    df = df.assign(target=target)
+    return df.sort_values(list(df.columns)).reset_index(drop=True)
+
+
+@pytest.mark.parametrize('is_tree', [True, False])
+def test_fe_chunked_matches_fe_with_missing_categories(tmp_path, is_tree):
+    df = loan_stats(500)
+    df.loc[::7, 'purpose'] = np.nan
+    df.to_csv(tmp_path / 'loans.csv', index=False)
+
+    x, y, cat_idx, rounder = fe(df.copy(), is_tree=is_tree)
+    assert ('purpose_999' in x.columns) == is_tree
+
+    chunks, chunked_cat_idx, chunked_rounder = fe_chunked(str(tmp_path / 'loans.csv'), is_tree=is_tree, chunksize=120)
+    chunks = list(chunks)
+    x_chunked = pd.concat([chunk for chunk, _ in chunks])
+    y_chunked = np.concatenate([target for _, target in chunks])
+
+    assert chunked_cat_idx == cat_idx and chunked_rounder == rounder
+    assert list(x_chunked.columns) == list(x.columns)
+    assert x_chunked.dtypes.equals(x.dtypes)
+    pd.testing.assert_frame_equal(sorted_rows(x_chunked, y_chunked), sorted_rows(x, y))
+
+
+def test_fe_chunked_dtypes_with_filtered_out_chunk(tmp_path):
+    # a vintage of only 'Current' loans is filtered out entirely
+    loan_stats(300, loan_status=['Current'], seed=1).to_csv(tmp_path / 'current.csv', index=False)
+    loan_stats(300).to_csv(tmp_path / 'loans.csv', index=False)
+
+    x, _, _, _ = fe(loan_stats(300), is_tree=True)
+    chunks, _, _ = fe_chunked([str(tmp_path / 'current.csv'), str(tmp_path / 'loans.csv')], chunksize=300)
+
+    for chunk, _ in chunks:
+        assert chunk.dtypes.equals(x.dtypes)
@@ -0,0 +1,116 @@
+#
+# Copyright 2024 Zest AI All Rights Reserved
+#
+#
+#
+# It is prohibited to copy, in whole or in part, modify, directly or
+# indirectly reverse engineer, disassemble, decompile, decode or adapt
+# this code or any portion or aspect thereof, or otherwise attempt to
+# derive or gain access to any part of the source code or algorithms
+# contained herein as provided in your ZAML agreement.
+#
+import multiprocessing
+import time
+
+import numpy as np
+import pytest
+import sklearn.datasets as ds
+
+from ztestdata.datasets.load_data import LOADERS, load_data, load_datasets
+
+# patched loaders only reach forked process workers
+EXECUTORS = ['thread', pytest.param('process', marks=pytest.mark.skipif(
+    multiprocessing.get_start_method() != 'fork', reason='patched loaders need forked workers'))]
+SLOW = 2
+
+
+def seeded_data(dataset, N, noise_dim):
+    """x, y of the generated datasets, drawn like load_data always did"""
+    if dataset == 'max':
+        x = np.random.randn(N, 2 + noise_dim).astype(np.float32)
+        y = np.max(x[:, :2], axis=1).astype(np.float32)
+    elif dataset == 'simple':
+        x = np.random.randn(N, 1 + noise_dim).astype(np.float32)
+        y = x[:, 0] > 0
+    elif dataset == 'xor':
+        x = np.random.randn(N, 2 + noise_dim).astype(np.float32)
+        y = np.logical_xor(x[:, 0] > 0, x[:, 1] > 0).astype(np.float32)
+    elif dataset == 'correlated':
+        x = np.random.randn(N, 1)
+        x = np.concatenate(
+            [x, x+0.1*np.random.randn(N, 2), np.random.randn(N, noise_dim)],
+            axis=1).astype(np.float32)
+        y = np.sum(x[:, :3], axis=1).astype(np.float32)
+    elif dataset == 'ring':
+        x, y = ds.make_circles(n_samples=N, noise=0.1)
+    elif dataset == 'moons':
+        x, y = ds.make_moons(n_samples=N, noise=0.1, random_state=1337)
+    elif dataset == 'mv_gate':
+        x = np.random.randn(N, noise_dim+4).astype(np.float32)
+        y = (x[:, 0] + x[:, 1] * np.logical_xor(x[:, 2] > 0, x[:, 3] > 0)).astype(np.float32)
+    return x, y
+
+
+@pytest.mark.parametrize('dataset', ['max', 'simple', 'xor', 'correlated', 'ring', 'moons', 'mv_gate'])
+@pytest.mark.parametrize('noise_dim', [0, 3])
+def test_load_data_seeded(dataset, noise_dim):
+    np.random.seed(0)
+    expected_x, expected_y = seeded_data(dataset, 500, noise_dim)
+    np.random.seed(0)
+    x, y, _ = load_data(dataset, N=500, noise_dim=noise_dim)
+
+    assert x.dtype == expected_x.dtype and y.dtype == expected_y.dtype
+    np.testing.assert_array_equal(x, expected_x)
+    np.testing.assert_array_equal(y, expected_y)
+
+
+def sleep(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+def fail():
+    raise ValueError('load failed')
+
+
+@pytest.fixture
+def slow_loaders(monkeypatch):
+    monkeypatch.setitem(LOADERS, 'sleep', sleep)
+    monkeypatch.setitem(LOADERS, 'fail', fail)
+
+
+@pytest.mark.parametrize('executor', ['thread', 'process'])
+def test_load_datasets(executor):
+    specs = ['xor', {'dataset': 'simple', 'N': 100}, 'census_income', {'dataset': 'protected', 'N': 1000}]
+    results = list(load_datasets(specs, executor=executor))
+
+    assert sorted(map(str, [spec for spec, _ in results])) == sorted(map(str, specs))
+    data = {str(spec): data for spec, data in results}
+    assert data['xor'][0].shape == (10000, 2)
+    assert data[str(specs[1])][0].shape == (100, 1)
+    assert len(data['census_income'][0]) == len(data['census_income'][1])
+    assert len(data[str(specs[3])]) == 1000
+
+
+@pytest.mark.parametrize('executor', EXECUTORS)
+def test_load_datasets_yields_as_completed(slow_loaders, executor):
+    specs = [{'dataset': 'sleep', 'seconds': 1}, {'dataset': 'sleep', 'seconds': 0}]
+    assert [data for _, data in load_datasets(specs, executor=executor)] == [0, 1]
+
+
+@pytest.mark.parametrize('executor', EXECUTORS)
+@pytest.mark.parametrize('stop', ['break', 'close', 'raise'])
+def test_load_datasets_stops_promptly(slow_loaders, executor, stop):
+    first = 'fail' if stop == 'raise' else {'dataset': 'sleep', 'seconds': 0}
+    specs = [first] + [{'dataset': 'sleep', 'seconds': SLOW}] * 3
+    start = time.time()
+    results = load_datasets(specs, executor=executor, max_workers=2)
+    if stop == 'raise':
+        with pytest.raises(ValueError, match='load failed'):
+            list(results)
+    else:
+        for _ in results:
+            break
+        if stop == 'close':
+            results.close()
+    assert time.time() - start < SLOW / 2
@@ -0,0 +1,128 @@
+#
+# Copyright 2024 Zest AI All Rights Reserved
+#
+#
+#
+# It is prohibited to copy, in whole or in part, modify, directly or
+# indirectly reverse engineer, disassemble, decompile, decode or adapt
+# this code or any portion or aspect thereof, or otherwise attempt to
+# derive or gain access to any part of the source code or algorithms
+# contained herein as provided in your ZAML agreement.
+#
+import numpy as np
+import pytest
+
+from ztestdata.datasets.scalers import SCALER_TYPES, ZamlScaler
+
+N = 1000
+CHUNK_SIZE = 128
+
+
+def sample(dtype, with_nan=False, n_features=6, seed=0):
+    rng = np.random.default_rng(seed)
+    x = rng.normal(3, 2, (N, n_features)) * rng.uniform(0.1, 100, n_features)
+    # a binary column, like the one hot columns of cat_cols
+    x[:, 0] = rng.integers(0, 2, N)
+    x = x.astype(dtype)
+    if with_nan:
+        x[rng.random(x.shape) < 0.05] = np.nan
+    return x
+
+
+def fit_engines(scaler_type, x, cat_cols):
+    scalers = [ZamlScaler(cat_cols, scaler_type, engine=engine, n_jobs=4, chunk_size=CHUNK_SIZE)
+               for engine in ['sklearn', 'numpy']]
+    return scalers, [scaler.fit_transform(x) for scaler in scalers]
+
+
+@pytest.mark.parametrize('scaler_type', SCALER_TYPES)
+@pytest.mark.parametrize('dtype', [np.float32, np.float64, np.int64])
+@pytest.mark.parametrize('cat_cols', [[[]], [[0, 1]], [[0], [3, 5]]])
+def test_numpy_engine_matches_sklearn(scaler_type, dtype, cat_cols):
+    x = sample(dtype)
+    (sklearn_scaler, numpy_scaler), (expected, result) = fit_engines(scaler_type, x, cat_cols)
+    np.testing.assert_array_equal(result, expected)
+
+    new_x = sample(dtype, seed=1)
+    np.testing.assert_array_equal(numpy_scaler.transform(new_x), sklearn_scaler.transform(new_x))
+    if scaler_type == 'normalize':
+        for scaler in [sklearn_scaler, numpy_scaler]:
+            with pytest.raises(AttributeError):
+                scaler.inverse_transform(expected)
+    else:
+        np.testing.assert_array_equal(numpy_scaler.inverse_transform(expected),
+                                      sklearn_scaler.inverse_transform(expected))
+
+
+@pytest.mark.parametrize('scaler_type', ['identity', 'standardize', 'robust'])
+@pytest.mark.parametrize('dtype', [np.float32, np.float64])
+@pytest.mark.parametrize('cat_cols', [[[]], [[0, 1]]])
+def test_numpy_engine_matches_sklearn_with_nan(scaler_type, dtype, cat_cols):
+    x = sample(dtype, with_nan=True)
+    (sklearn_scaler, numpy_scaler), (expected, result) = fit_engines(scaler_type, x, cat_cols)
+    np.testing.assert_array_equal(result, expected)
+    np.testing.assert_array_equal(numpy_scaler.inverse_transform(expected),
+                                  sklearn_scaler.inverse_transform(expected))
+
+
+@pytest.mark.parametrize('engine', ['sklearn', 'numpy'])
+def test_normalize_rejects_nan(engine):
+    with pytest.raises(ValueError, match='NaN'):
+        ZamlScaler(scaler_type='normalize', engine=engine).fit_transform(sample(np.float64, with_nan=True))
+
+
+@pytest.mark.parametrize('scaler_type', ['standardize', 'robust', 'normalize'])
+@pytest.mark.parametrize('engine', ['sklearn', 'numpy'])
+def test_scalers_reject_inf(scaler_type, engine):
+    x = sample(np.float64)
+    x[3, 2] = np.inf
+    with pytest.raises(ValueError, match='infinity'):
+        ZamlScaler(scaler_type=scaler_type, engine=engine).fit_transform(x)
+
+
+@pytest.mark.parametrize('scaler_type', ['standardize', 'robust', 'normalize'])
+@pytest.mark.parametrize('n_features', [5, 8])
+def test_numpy_engine_rejects_column_count(scaler_type, n_features):
+    scaler = ZamlScaler(scaler_type=scaler_type, engine='numpy')
+    scaler.fit_transform(sample(np.float64))
+    with pytest.raises(ValueError, match='features'):
+        scaler.transform(sample(np.float64, n_features=n_features))
+
+
+def test_identity_column_count_matches_sklearn():
+    (sklearn_scaler, numpy_scaler), _ = fit_engines('identity', sample(np.float64), [[0, 1]])
+    new_x = sample(np.float64, n_features=8)
+    np.testing.assert_array_equal(numpy_scaler.transform(new_x), sklearn_scaler.transform(new_x))
+    for scaler in [sklearn_scaler, numpy_scaler]:
+        with pytest.raises(IndexError):
+            scaler.transform(sample(np.float64, n_features=5))
+
+
+@pytest.mark.parametrize('scaler_type', SCALER_TYPES)
+@pytest.mark.parametrize('engine', ['sklearn', 'numpy'])
+@pytest.mark.parametrize('cat_cols', [[[]], [[0, 1]]])
+def test_transform_row_matches_transform(scaler_type, engine, cat_cols):
+    x = sample(np.float64)
+    scaler = ZamlScaler(cat_cols, scaler_type, engine=engine)
+    scaler.fit_transform(x)
+    scaler.compile_row()
+    out = np.empty(x.shape[1])
+    for row in sample(np.float64, seed=1)[:50]:
+        np.testing.assert_array_equal(scaler.transform_row(row), scaler.transform(row)[0])
+        np.testing.assert_array_equal(scaler.transform_row(row, out=out), scaler.transform(row)[0])
+
+
+@pytest.mark.parametrize('engine', ['sklearn', 'numpy'])
+def test_transform_row_requires_compile(engine):
+    scaler = ZamlScaler(scaler_type='standardize', engine=engine)
+    with pytest.raises(AssertionError, match='fit_transform'):
+        scaler.compile_row()
+    x = sample(np.float64)
+    scaler.fit_transform(x)
+    with pytest.raises(AssertionError, match='compile_row'):
+        scaler.transform_row(x[0])
+
+    scaler.compile_row()
+    scaler.fit_transform(x * 2)
+    with pytest.raises(AssertionError, match='compile_row'):
+        scaler.transform_row(x[0])
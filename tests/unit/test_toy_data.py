@@ -0,0 +1,97 @@
+#
+# Copyright 2024 Zest AI All Rights Reserved
+#
+#
+#
+# It is prohibited to copy, in whole or in part, modify, directly or
+# indirectly reverse engineer, disassemble, decompile, decode or adapt
+# this code or any portion or aspect thereof, or otherwise attempt to
+# derive or gain access to any part of the source code or algorithms
+# contained herein as provided in your ZAML agreement.
+#
+import numpy as np
+import pandas as pd
+import pytest
+
+from ztestdata.datasets.toy_data import CENSUS_INCOME_DATA, census_income, protected_data
+
+CENSUS_COLUMNS = ['age', 'workclass', 'fnlwgt', 'education', 'education_num',
+                  'marital_status', 'occupation', 'relationship', 'race', 'gender',
+                  'capital_gain', 'capital_loss', 'hours_per_week', 'country', 'target']
+
+
+@pytest.fixture(scope='module')
+def census():
+    """Census income fixture, with the raw '?' of the missing categories, and its training encoding"""
+    raw = pd.read_csv(CENSUS_INCOME_DATA, names=CENSUS_COLUMNS, sep=r'\s*,\s*', engine='python', nrows=3000)
+    X, _, _, preprocessor = census_income(CENSUS_INCOME_DATA, return_preprocessor=True)
+    return raw, X.iloc[:3000], preprocessor
+
+
+def test_census_income_transform_matches_training(census):
+    raw, X, preprocessor = census
+    assert (raw == '?').any().any()
+    pd.testing.assert_frame_equal(preprocessor.transform(raw), X)
+
+
+def test_census_income_transform_records_matches_training(census):
+    raw, X, preprocessor = census
+    np.testing.assert_array_equal(preprocessor.transform_records(raw.to_dict('records')), X.values)
+
+
+def test_census_income_missing_category(census):
+    raw, _, preprocessor = census
+    row = raw.iloc[[0]]
+    expected = preprocessor.transform(row.assign(workclass=np.nan)).values
+    for value in ['?', None, np.nan]:
+        record = dict(row.iloc[0], workclass=value)
+        np.testing.assert_array_equal(preprocessor.transform(pd.DataFrame([record])).values, expected)
+        np.testing.assert_array_equal(preprocessor.transform_records(record), expected)
+    record = row.iloc[0].to_dict()
+    del record['workclass']
+    np.testing.assert_array_equal(preprocessor.transform_records(record), expected)
+
+
+@pytest.mark.parametrize('value', [None, np.nan, 'missing'])
+def test_census_income_missing_numeric_field(census, value):
+    raw, _, preprocessor = census
+    record = raw.iloc[0].to_dict()
+    if value == 'missing':
+        del record['age']
+    else:
+        record['age'] = value
+        with pytest.raises(ValueError, match='age'):
+            preprocessor.transform(pd.DataFrame([record]))
+    with pytest.raises(ValueError, match='age'):
+        preprocessor.transform_records(record)
+
+
+def test_protected_data_labels_match_probabilities():
+    df = protected_data(N=20000, race_threshold=0.5, gender_threshold=0.6, minority_threshold=0.5,
+                        age_threshold=50, random_state=0)
+    status = {'Protected', 'Unprotected', 'Unknown'}
+
+    gender = df.dropna(subset=['prob_female'])
+    assert ((gender['prob_female'] - 0.5) * (gender['prob_female_age'] - 0.5) >= 0).all()
+    assert ((gender['prob_female_age'] - 0.5).abs() >= (gender['prob_female'] - 0.5).abs() - 1e-12).all()
+    expected = np.select([df['prob_female_age'] >= 0.6, df['prob_male_age'] >= 0.6], ['Female', 'Male'], 'Unknown')
+    assert (df['proxy_gender'] == expected).all()
+    expected = df['proxy_gender'].map({'Female': 'Protected', 'Male': 'Unprotected', 'Unknown': 'Unknown'})
+    assert (df['proxy_gender_status'] == expected).all()
+
+    bisg = df.filter(like='bisg')
+    race = bisg.idxmax(axis=1, skipna=True).str[len('bisg'):].where(bisg.max(axis=1) >= 0.5, 'Unknown')
+    assert (df['proxy_race'] == race).all()
+    expected = np.select([race == 'Unknown', race == 'White'], ['Unknown', 'Unprotected'], 'Protected')
+    assert (df['proxy_race_status'] == expected).all()
+
+    minority = df['prob_minority'].notna()
+    expected = np.where(df.loc[minority, 'prob_minority'] >= 0.5, 'high', 'low')
+    assert (df.loc[minority, 'proxy_minority'] == expected).all()
+    assert df.loc[~minority, 'proxy_minority'].isna().all()
+
+    expected = np.select([df['age_actual'].isna(), df['age_actual'] >= 50], ['Unknown', '50+'], '<50')
+    assert (df['proxy_age'] == expected).all()
+    expected = np.select([df['age_actual'].isna(), df['age_actual'] >= 50], ['Unknown', 'Protected'], 'Unprotected')
+    assert (df['proxy_age_status'] == expected).all()
+    assert set(df['proxy_gender_status']) | set(df['proxy_race_status']) | set(df['proxy_age_status']) == status
@@ -5,5 +5,6 @@
 ##
 ## It is prohibited to copy, in whole or in part, modify, directly or indirectly reverse engineer, disassemble, decompile, decode or adapt this code or any portion or aspect thereof, or otherwise attempt to derive or gain access to any part of the source code or algorithms contained herein as provided in your ZAML agreement.
 ##
-from .load_data import load_data
+from .dataset import Dataset
+from .load_data import load_data, load_datasets
 from .scalers import ZamlScaler
@@ -0,0 +1,198 @@
+##
+## Copyright 2024 Zest AI All Rights Reserved
+##
+##
+##
+## It is prohibited to copy, in whole or in part, modify, directly or indirectly reverse engineer, disassemble, decompile, decode or adapt this code or any portion or aspect thereof, or otherwise attempt to derive or gain access to any part of the source code or algorithms contained herein as provided in your ZAML agreement.
+##
+"""Lazy dataset handle with column projection and row slice pushdown
+"""
+import numpy as np
+import pandas as pd
+
+from .load_data import GENERATORS, SKLEARN_GENERATORS, load_data
+from .scalers import ZamlScaler
+from .toy_data import BOSTON_CSV, boston_data
+
+
+# rows drawn per random stream of a generated column
+BLOCK_SIZE = 65536
+
+
+class Dataset:
+    """
+    Lazy handle on a `load_data` dataset.
+
+    Nothing is generated or parsed until `x` or `y` is accessed. Indexing the
+    handle like an array, e.g. `dataset[:1000, :2]`, returns a new handle on
+    the selected rows and columns, which is pushed down into the data
+    generation: generated datasets only draw the selected rows of the selected
+    noise columns, and 'boston' only parses the selected rows and columns.
+    Every column of the generated datasets is drawn from its own random
+    streams, in blocks of rows, so a selection holds the same values as the
+    full dataset with the same random_state.
+
+    Parameters
+    ----------
+    dataset: str
+        Name of selected dataset. Possible options: the datasets of `load_data`, 'boston'.
+
+    scaler_type : str, default='identity'
+        Name of scaler type. Possible options: 'identity', 'robust', 'standardize', 'normalize'.
+
+    random_state : int, default=None
+        Seed of the generated datasets. If None, drawn from numpy's global random state.
+
+    kwargs : dict
+        Dataset parameters of `load_data`: N, noise_dim, is_tree.
+    """
+
+    def __init__(self, dataset, scaler_type='identity', random_state=None, **kwargs):
+        params = {
+            'N': 10000,
+            'noise_dim': 0,
+            'is_tree': True}
+        params.update(kwargs)
+        self.dataset = dataset
+        self.scaler_type = scaler_type
+        self.params = params
+        self.random_state = np.random.randint(2**31) if random_state is None else random_state
+        self.rows = None
+        self.columns = None
+        self._x, self._y, self._scaler, self._loaded = None, None, None, None
+
+    @property
+    def n_rows(self):
+        """Number of rows of the full dataset."""
+        if self.dataset in GENERATORS or self.dataset in SKLEARN_GENERATORS:
+            return self.params['N']
+        if self.dataset == 'boston':
+            with open(BOSTON_CSV) as f:
+                return sum(1 for _ in f) - 1
+        return len(self._load()[1])
+
+    @property
+    def n_columns(self):
+        """Number of columns of the full dataset."""
+        if self.dataset in GENERATORS:
+            return GENERATORS[self.dataset][0] + self.params['noise_dim']
+        if self.dataset in SKLEARN_GENERATORS:
+            return 2
+        if self.dataset == 'boston':
+            return len(_boston_columns())
+        return self._load()[0].shape[1]
+
+    @property
+    def shape(self):
+        start, stop = self._row_range()
+        return stop - start, len(self._column_idx())
+
+    def __getitem__(self, key):
+        rows, columns = key if isinstance(key, tuple) else (key, slice(None))
+        assert isinstance(rows, slice) and rows.step in [None, 1], 'rows must be a contiguous slice'
+        start, stop = self._row_range()
+        new_start, new_stop, _ = rows.indices(stop - start)
+
+        dataset = Dataset(self.dataset, self.scaler_type, self.random_state, **self.params)
+        dataset.rows = (start + new_start, start + max(new_start, new_stop))
+        dataset.columns = np.atleast_1d(self._column_idx()[columns])
+        dataset._loaded = self._loaded
+        return dataset
+
+    @property
+    def x(self):
+        if self._x is None:
+            self._x = self._get_x()
+        return self._x
+
+    @property
+    def y(self):
+        if self._y is None:
+            self._y = self._get_y()
+        return self._y
+
+    @property
+    def scaler(self):
+        if self._scaler is None:
+            if self.dataset == 'lendingclub':
+                self._scaler = self._load()[2]
+            else:
+                self._scaler = ZamlScaler(scaler_type=self.scaler_type)
+        return self._scaler
+
+    def _row_range(self):
+        return (0, self.n_rows) if self.rows is None else self.rows
+
+    def _column_idx(self):
+        return np.arange(self.n_columns) if self.columns is None else self.columns
+
+    def _get_x(self):
+        start, stop = self._row_range()
+        columns = self._column_idx()
+        if self.dataset == 'boston':
+            names = _boston_columns()
+            x = _read_boston(start, stop, [names[i] for i in np.unique(columns)])
+            return x[[names[i] for i in columns]]
+        if self.dataset not in GENERATORS:
+            x = self._load()[0][start:stop]
+            return x.iloc[:, columns] if isinstance(x, pd.DataFrame) else x[:, columns]
+
+        n_signal = GENERATORS[self.dataset][0]
+        x = np.zeros((stop - start, columns.size), dtype=np.float32)
+        is_signal = columns < n_signal
+        if is_signal.any():
+            x[:, is_signal] = self._signal(start, stop)[:, columns[is_signal]]
+        for i in np.flatnonzero(~is_signal):
+            x[:, i] = self._draw(columns[i], start, stop)
+        return x
+
+    def _get_y(self):
+        start, stop = self._row_range()
+        if self.dataset == 'boston':
+            return _read_boston(start, stop, ['target'])['target']
+        if self.dataset not in GENERATORS:
+            return self._load()[1][start:stop]
+        return GENERATORS[self.dataset][3](self._signal(start, stop))
+
+    def _signal(self, start, stop):
+        n_signal, _, mix, _ = GENERATORS[self.dataset]
+        z = np.stack([self._draw(i, start, stop) for i in range(n_signal)], axis=1)
+        return mix(z).astype(np.float32)
+
+    def _draw(self, column, start, stop):
+        """Standard normal draws of a column, each block of rows from its own stream."""
+        if stop <= start:
+            return np.zeros(0)
+        draws = []
+        for block in range(start // BLOCK_SIZE, (stop - 1) // BLOCK_SIZE + 1):
+            rng = np.random.default_rng([self.random_state, column, block])
+            offset = block * BLOCK_SIZE
+            draws.append(rng.standard_normal(min(stop - offset, BLOCK_SIZE))[max(start - offset, 0):])
+        return np.concatenate(draws)
+
+    def _load(self):
+        """Full x, y, scaler of the datasets without pushdown, shared with the handles indexed from this one."""
+        if self._loaded is None:
+            N = self.params['N']
+            if self.dataset in SKLEARN_GENERATORS:
+                x, y = SKLEARN_GENERATORS[self.dataset](N, self.random_state)
+                self._loaded = x, y, ZamlScaler(scaler_type=self.scaler_type)
+            elif self.dataset == 'boston':
+                self._loaded = boston_data(self.scaler_type)
+            else:
+                self._loaded = load_data(self.dataset, self.scaler_type, **self.params)
+        return self._loaded
+
+
+def _boston_columns():
+    return list(pd.read_csv(BOSTON_CSV, nrows=0).columns.drop('target'))
+
+
+def _read_boston(start, stop, usecols):
+    if stop <= start:
+        # parse a row for the dtypes, an empty read has object columns
+        df = pd.read_csv(BOSTON_CSV, usecols=usecols, nrows=1).iloc[:0]
+    else:
+        df = pd.read_csv(BOSTON_CSV, usecols=usecols, skiprows=range(1, start + 1), nrows=stop - start)
+    df.index = pd.RangeIndex(start, start + len(df))
+    return df
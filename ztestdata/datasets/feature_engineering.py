@@ -7,6 +7,8 @@
 ##
 """Feature engineering for 2007-2012 lendingclub dataset
 """
+import os
+import tempfile
 from functools import reduce
 from collections import OrderedDict
 import numpy as np
@@ -181,6 +183,18 @@ ROUNDER = {
     'revol_bal': 2,
     'credit_age': 4}
 
+# target encoding
+TARGET_ENCODING = {'Fully Paid': 1, 'Charged Off': 0}
+
+
+# categorical features one hot encoded by fe
+CAT_COLS = ['term', 'home_ownership', 'verification_status', 'purpose']
+
+
+# variables imputed with their mean when not preparing data for a tree model
+MISSING_VAR = ['mths_since_last_delinq', 'mths_since_last_record']
+
+
 def fe(df, is_tree=True):
     """
     Function to feature engineering.
@@ -197,7 +211,118 @@ def fe(df, is_tree=True):
     df, target, cat_idx, rounder : tuple
         Data, target, id of categorical variables, list of rounding digits of continuous variables
     """
+    df = _clean_rows(df)
+
+    # order by date then extract
+    df.sort_values('issue_d', inplace=True)
+    issue_d = df.loc[:, 'issue_d']
+    df.drop(['issue_d'], axis=1, inplace=True)
+
+    means = {var: np.mean(df.loc[df[var].notnull(), var]) for var in MISSING_VAR}
+    categories = {col: _categories(_category_values(df, col, is_tree)) for col in CAT_COLS}
+    df, target = _engineer(df, is_tree, means, categories)
+    print('Target encoding: {:s}={:d}, {:s}={:d}'.format(*reduce(lambda e1, e2: e1+e2, TARGET_ENCODING.items())))
+
+    rounder, cat_idx = _column_info(df.columns, is_tree)
+
+    print('lendingclub data: {:d} rows x {:d} cols'.format(*df.shape))
 
+    return df, target, cat_idx, rounder
+
+
+def fe_chunked(path, is_tree=True, chunksize=100000, **kwargs):
+    """
+    Out-of-core version of `fe` for LendingClub csv files too large for memory.
+
+    A first pass over the csv chunks collects the global state of `fe`: the
+    means of the imputed variables, the categories of the one hot encoded
+    variables and the issue dates used for ordering. A second pass engineers
+    every chunk with that state and spills it, in issue date order, to a
+    temporary file, which is then read back chunk by chunk.
+
+    Parameters
+    ----------
+    path : str or list
+        Path, or list of paths for concatenated vintages, to LendingClub csv files.
+
+    is_tree : boolean, default=True
+        If True, prepare data for a tree model
+
+    chunksize : int, default=100000
+        Number of csv rows read, and of engineered rows returned, per chunk.
+
+    kwargs : dict
+        Extra arguments for `pd.read_csv`.
+
+    Returns
+    ----------
+    chunks, cat_idx, rounder : tuple
+        Generator of (data, target) chunks, id of categorical variables, list of rounding digits of continuous
+        variables
+    """
+    paths = [path] if isinstance(path, str) else list(path)
+    kwargs = {'low_memory': False, 'encoding': 'latin-1', **kwargs}
+
+    def read_chunks():
+        for p in paths:
+            for df in pd.read_csv(p, chunksize=chunksize, **kwargs):
+                yield _clean_rows(df)
+
+    # first pass: global statistics, categories and ordering
+    sums = dict.fromkeys(MISSING_VAR, 0.)
+    counts = dict.fromkeys(MISSING_VAR, 0)
+    categories = {col: set() for col in CAT_COLS}
+    issue_d = []
+    for df in read_chunks():
+        for var in MISSING_VAR:
+            sums[var] += df[var].sum()
+            counts[var] += df[var].count()
+        for col in CAT_COLS:
+            categories[col].update(_category_values(df, col, is_tree))
+        issue_d.append(df['issue_d'].values)
+    means = {var: sums[var] / counts[var] if counts[var] else np.nan for var in MISSING_VAR}
+    categories = {col: _categories(values) for col, values in categories.items()}
+    issue_d = np.concatenate(issue_d) if issue_d else np.array([], dtype='datetime64[ns]')
+    rank = np.empty(issue_d.size, dtype=int)
+    rank[np.argsort(issue_d, kind='stable')] = np.arange(issue_d.size)
+
+    # the column layout only depends on the categories, so engineer an empty frame to get it
+    empty = _clean_rows(pd.DataFrame(columns=GOOD_VAR.keys())).drop(['issue_d'], axis=1)
+    columns = _engineer(empty, is_tree, means, categories)[0].columns
+    rounder, cat_idx = _column_info(columns, is_tree)
+
+    print('Target encoding: {:s}={:d}, {:s}={:d}'.format(*reduce(lambda e1, e2: e1+e2, TARGET_ENCODING.items())))
+    print('lendingclub data: {:d} rows x {:d} cols'.format(issue_d.size, len(columns)))
+
+    def engineered_chunks():
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            x = np.lib.format.open_memmap(
+                os.path.join(tmp_dir, 'x.npy'), mode='w+', dtype=np.float64, shape=(issue_d.size, len(columns)))
+            target = np.zeros(issue_d.size, dtype=int)
+            dtypes, offset = None, 0
+
+            # second pass: engineer each chunk and spill it at its sorted position
+            for df in read_chunks():
+                idx = rank[offset:offset + len(df)]
+                offset += len(df)
+                df, y = _engineer(df.drop(['issue_d'], axis=1), is_tree, means, categories)
+                # chunks emptied by the row filters lose the dtypes, e.g. credit_age is object
+                if dtypes is None and len(df) > 0:
+                    dtypes = df.dtypes
+                x[idx] = np.array(df, dtype=np.float64)
+                target[idx] = y
+
+            for start in range(0, issue_d.size, chunksize):
+                stop = start + chunksize
+                df = pd.DataFrame(x[start:stop], columns=columns, index=np.arange(start, min(stop, issue_d.size)))
+                yield df.astype(dtypes), target[start:stop]
+            del x
+
+    return engineered_chunks(), cat_idx, rounder
+
+
+def _clean_rows(df):
+    """Row-wise part of `fe`: filter rows, parse and recode the variables."""
     # take the variables of interest and remove null rows
     df = df.loc[:, GOOD_VAR.keys()]
     keep_idx = np.logical_not(df.isnull().apply(all, axis=1))
@@ -215,11 +340,7 @@ def fe(df, is_tree=True):
     df.loc[:, 'issue_d'] = pd.to_datetime(df.loc[:, 'issue_d'], format='%b-%y')
     df.loc[:, 'earliest_cr_line'] = pd.to_datetime(df.loc[:, 'earliest_cr_line'], format='%b-%y')
     df.loc[:, 'credit_age'] = (df['issue_d'] - df['earliest_cr_line']).apply(lambda x: x.days/365)
-
-    # order by date then extract
-    df.sort_values('issue_d', inplace=True)
-    issue_d = df.loc[:, 'issue_d']
-    df.drop(['earliest_cr_line', 'addr_state', 'issue_d'], axis=1, inplace=True)
+    df.drop(['earliest_cr_line', 'addr_state'], axis=1, inplace=True)
 
     # interest rate to percent
     df.loc[:, 'int_rate'] = df['int_rate'].apply(lambda x: float(x.rstrip('%'))/100)
@@ -229,20 +350,24 @@ def fe(df, is_tree=True):
     idx2 = df.loc[:, 'emp_length'] == 'n/a'
     df.loc[np.logical_or(idx1, idx2), 'emp_length'] = '0'
 
+    # purpose columns to file under other
+    move_to_other = ['moving', 'house', 'vacation', 'educational', 'renewable_energy']
+    idx = df.purpose.isin(move_to_other)
+    df.loc[idx, 'purpose'] = 'other'
+
+    return df
+
+
+def _engineer(df, is_tree, means, categories):
+    """Part of `fe` depending on global state: the imputation means and the one hot categories."""
     if is_tree:
         df.fillna(999, inplace=True)
     else:
-        missing = ['mths_since_last_delinq', 'mths_since_last_record']
-        for var in missing:
+        for var in MISSING_VAR:
             new_var = var + '_isNA'
             idx = df.loc[:, var].isnull()
             df.loc[:, new_var] = idx
-            df.loc[idx, var] = np.mean(df.loc[np.logical_not(idx), var])
-
-    # purpose columns to file under other
-    move_to_other = ['moving', 'house', 'vacation', 'educational', 'renewable_energy']
-    idx = df.purpose.isin(move_to_other)
-    df.loc[idx, 'purpose'] = 'other'
+            df.loc[idx, var] = means[var]
 
     # ordinal var: emp_length
     df = df.assign(emp_length_yrs=df.emp_length.str.extract('(\d+)', expand=False).astype(np.float32))
@@ -250,29 +375,43 @@ def fe(df, is_tree=True):
     df.drop('emp_length', axis=1, inplace=True)
 
     # categorical features
-    cat_cols = 'term home_ownership verification_status purpose'.split(' ')
-    df = pd.get_dummies(df, prefix=cat_cols, columns=cat_cols)
+    for col in CAT_COLS:
+        df[col] = pd.Categorical(df[col], categories=categories[col])
+    df = pd.get_dummies(df, prefix=CAT_COLS, columns=CAT_COLS)
 
     # split target and input data
-    d = {'Fully Paid': 1, 'Charged Off': 0}
+    d = TARGET_ENCODING
     target = np.array(df.loc[:, 'loan_status'].apply(lambda x: d[x]))
     df.drop('loan_status', axis=1, inplace=True)
-    print('Target encoding: {:s}={:d}, {:s}={:d}'.format(*reduce(lambda e1, e2: e1+e2, d.items())))
 
     df.rename(
         index=str,
         columns=dict(zip(df.columns, [name.replace(' ', '') for name in df.columns])),
         inplace=True)
 
-    rounder = get_rounder(df.columns)
+    return df, target
 
-    if not is_tree:
-        cat_cols = ['mths_since_last_delinq_isNA', 'mths_since_last_record_isNA'] + cat_cols
-    cat_idx = find_categoricals(df.columns, cat_cols)
 
-    print('lendingclub data: {:d} rows x {:d} cols'.format(*df.shape))
+def _category_values(df, col, is_tree):
+    # for a tree model the NaN categories are filled with 999 and get their own dummy
+    values = df[col].fillna(999) if is_tree else df[col].dropna()
+    return values.unique()
 
-    return df, target, cat_idx, rounder
+
+def _categories(values):
+    # same category order as pd.get_dummies, also for the 999 fill mixed with strings
+    return pd.Categorical(list(values)).categories.tolist()
+
+
+def _column_info(names, is_tree):
+    rounder = get_rounder(names)
+
+    cat_cols = CAT_COLS
+    if not is_tree:
+        cat_cols = [var + '_isNA' for var in MISSING_VAR] + cat_cols
+    cat_idx = find_categoricals(names, cat_cols)
+
+    return rounder, cat_idx
 
 
 def find_categoricals(names, prefs):
@@ -18,12 +18,66 @@ Important note to data makers:
 
 """
 import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 import pandas as pd
 import numpy as np
 import sklearn.datasets as ds
 
 from .feature_engineering import fe
 from .scalers import ZamlScaler
+from .toy_data import almost_boston, boston_data, census_income_data, protected_data
+
+
+def _draw_randn(n_signal):
+    return lambda N, noise_dim: np.random.randn(N, n_signal + noise_dim)
+
+
+def _draw_correlated(N, noise_dim):
+    return np.concatenate([np.random.randn(N, 1), np.random.randn(N, 2), np.random.randn(N, noise_dim)], axis=1)
+
+
+# generated datasets: number of signal columns, standard normal draws of the signal and noise columns
+# from the global random state, signal columns from the draws, target
+GENERATORS = {
+    'max': (
+        2,
+        _draw_randn(2),
+        lambda z: z,
+        lambda x: np.max(x[:, :2], axis=1).astype(np.float32)),
+    'simple': (
+        1,
+        _draw_randn(1),
+        lambda z: z,
+        lambda x: x[:, 0] > 0),
+    'xor': (
+        2,
+        _draw_randn(2),
+        lambda z: z,
+        lambda x: np.logical_xor(x[:, 0] > 0, x[:, 1] > 0).astype(np.float32)),
+    'correlated': (
+        3,
+        _draw_correlated,
+        lambda z: np.concatenate([z[:, :1], z[:, :1] + 0.1 * z[:, 1:3]], axis=1),
+        lambda x: np.sum(x[:, :3], axis=1).astype(np.float32)),
+    'mv_gate': (
+        4,
+        _draw_randn(4),
+        lambda z: z,
+        lambda x: (x[:, 0] + x[:, 1] * np.logical_xor(x[:, 2] > 0, x[:, 3] > 0)).astype(np.float32))}
+
+
+# sklearn generated datasets: x, y from the number of samples and the random state
+SKLEARN_GENERATORS = {
+    'ring': lambda N, random_state=None: ds.make_circles(n_samples=N, noise=0.1, random_state=random_state),
+    'moons': lambda N, random_state=None: ds.make_moons(n_samples=N, noise=0.1, random_state=1337)}
+
+
+# datasets loaded outside of load_data, by name
+LOADERS = {
+    'boston': boston_data,
+    'almost_boston': almost_boston,
+    'census_income': census_income_data,
+    'protected': protected_data}
 
 
 def load_data(dataset, scaler_type='identity', **kwargs):
@@ -78,36 +132,76 @@ def load_data(dataset, scaler_type='identity', **kwargs):
 
         x = scaler.fit_transform(np.array(df).astype(np.float32))
 
-    elif dataset == 'max':
-        x = np.random.randn(N, 2 + noise_dim).astype(np.float32)
-        y = np.max(x[:, :2], axis=1).astype(np.float32)
+    elif dataset in GENERATORS:
+        n_signal, draw, mix, target = GENERATORS[dataset]
+        z = draw(N, noise_dim)
+        x = np.concatenate([mix(z[:, :n_signal]), z[:, n_signal:]], axis=1).astype(np.float32)
+        y = target(x)
 
-    elif dataset == 'simple':
-        x = np.random.randn(N, 1 + noise_dim).astype(np.float32)
-        y = x[:, 0] > 0
+    elif dataset in SKLEARN_GENERATORS:
+        x, y = SKLEARN_GENERATORS[dataset](N)
 
-    elif dataset == 'xor':
-        x = np.random.randn(N, 2 + noise_dim).astype(np.float32)
-        y = np.logical_xor(x[:, 0] > 0, x[:, 1] > 0).astype(np.float32)
+    else:
+        assert False, 'dataset not supported'
 
-    elif dataset == 'correlated':
-        x = np.random.randn(N, 1)
-        x = np.concatenate(
-            [x, x+0.1*np.random.randn(N, 2), np.random.randn(N, noise_dim)],
-            axis=1).astype(np.float32)
-        y = np.sum(x[:, :3], axis=1).astype(np.float32)
+    return x, y, scaler
 
-    elif dataset == 'ring':
-        x, y = ds.make_circles(n_samples=N, noise=0.1)
 
-    elif dataset == 'moons':
-        x, y = ds.make_moons(n_samples=N, noise=0.1, random_state=1337)
+def load_datasets(specs, executor='thread', max_workers=None):
+    """
+    Load several datasets concurrently.
 
-    elif dataset == 'mv_gate':
-        x = np.random.randn(N, noise_dim+4).astype(np.float32)
-        y = (x[:, 0] + x[:, 1] * np.logical_xor(x[:, 2] > 0, x[:, 3] > 0)).astype(np.float32)
+    Parameters
+    ----------
+    specs : list
+        Dataset specs. A spec is either a dataset name, or a dict with the name
+        under 'dataset' and the loader arguments, e.g.
+        {'dataset': 'xor', 'scaler_type': 'standardize', 'N': 1000}.
+        Names are the datasets of `load_data`, plus 'boston', 'almost_boston',
+        'census_income' and 'protected'.
+
+    executor : str, default='thread'
+        Pool type. Possible options: 'thread', 'process'. Threads overlap csv
+        parsing with numpy generation; processes also parallelize pure python work.
 
+    max_workers : int, default=None
+        Size of the pool. If None, one worker per spec.
+
+    Returns
+    -------
+    results : generator
+        Yields (spec, data) tuples, the spec and what its loader returned, in
+        order of completion. All loads are submitted when load_datasets is
+        called; when the iteration stops early or a load raises, the loads not
+        started yet are cancelled and the running ones finish in the background
+        without being waited for.
+    """
+    assert executor in ['thread', 'process'], 'executor not supported'
+    specs = list(specs)
+    max_workers = max_workers or max(len(specs), 1)
+    if executor == 'thread':
+        pool = ThreadPoolExecutor(max_workers=max_workers)
     else:
-        assert False, 'dataset not supported'
+        # forked workers share the parent random state, reseed them so they generate different data
+        pool = ProcessPoolExecutor(max_workers=max_workers, initializer=np.random.seed)
 
-    return x, y, scaler
+    futures = {pool.submit(_load_spec, spec): spec for spec in specs}
+    return _iter_completed(pool, futures)
+
+
+def _iter_completed(pool, futures):
+    try:
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+    finally:
+        for future in futures:
+            future.cancel()
+        pool.shutdown(wait=False)
+
+
+def _load_spec(spec):
+    kwargs = {'dataset': spec} if isinstance(spec, str) else dict(spec)
+    dataset = kwargs.pop('dataset')
+    if dataset in LOADERS:
+        return LOADERS[dataset](**kwargs)
+    return load_data(dataset, **kwargs)
@@ -5,6 +5,8 @@
 ##
 ## It is prohibited to copy, in whole or in part, modify, directly or indirectly reverse engineer, disassemble, decompile, decode or adapt this code or any portion or aspect thereof, or otherwise attempt to derive or gain access to any part of the source code or algorithms contained herein as provided in your ZAML agreement.
 ##
+import os
+from concurrent.futures import ThreadPoolExecutor
 from functools import reduce
 import numpy as np
 import pandas as pd
@@ -53,6 +55,11 @@ def flatten_list(l):
     return np.array(reduce(lambda x, y: x + y, l))
 
 
+SCALER_TYPES = ['identity', 'robust', 'standardize', 'normalize']
+
+ENGINES = ['sklearn', 'numpy']
+
+
 def get_scaler(scaler_type):
     d = {
         'identity': IdentityScaler(),
@@ -79,6 +86,165 @@ class IdentityScaler:
         return x
 
 
+class NumpyScaler:
+    """
+    Native NumPy engine for the ZamlScaler scaler types.
+
+    The fitted statistics and the transformed values match the sklearn
+    scalers returned by `get_scaler`, applied separately to each column
+    group. Statistics of all groups are computed in a single fit, and the
+    transforms are applied in row chunks on a thread pool, writing straight
+    into one preallocated output array.
+
+    Unlike the sklearn engine, which scales the fitted columns of wider inputs
+    and ignores the rest, the scaler types other than 'identity' raise a
+    ValueError when the input has a different number of columns than the fit.
+
+    Parameters
+    ----------
+    scaler_type : str, default='identity'
+        Name of scaler type. Possible options: 'identity', 'robust', 'standardize', 'normalize'.
+
+    n_jobs : int, default=None
+        Number of worker threads. If None, use the number of CPUs.
+
+    chunk_size : int, default=65536
+        Number of rows transformed per task.
+    """
+
+    def __init__(self, scaler_type='identity', n_jobs=None, chunk_size=65536):
+        assert scaler_type in SCALER_TYPES, 'not a valid scaler type'
+        self.scaler_type = scaler_type
+        self.n_jobs = n_jobs or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+
+    def fit_transform(self, x, groups):
+        self.fit(x, groups)
+        return self.transform(x)
+
+    def fit(self, x, groups):
+        """
+        Compute the scaling statistics of every column group.
+
+        Parameters
+        ----------
+        x : numpy ndarray shape (N,D)
+            Data to fit.
+
+        groups : list
+            Arrays of column indices scaled together, e.g. [cat_idx, cont_idx].
+        """
+        self._check_finite(x)
+        self.groups = [np.asarray(g, dtype=int) for g in groups if len(g) > 0]
+        self.center_ = np.zeros(x.shape[1])
+        self.scale_ = np.ones(x.shape[1])
+        if self.scaler_type in ['standardize', 'robust']:
+            fit_group = self._fit_standardize if self.scaler_type == 'standardize' else self._fit_robust
+            with ThreadPoolExecutor(max_workers=self.n_jobs) as pool:
+                stats = list(pool.map(lambda g: fit_group(_as_float(x[:, g])), self.groups))
+            # keep the precision of the fitted statistics, which can differ from float64 like in sklearn
+            self.center_ = self.center_.astype(np.result_type(*[center for center, _ in stats]))
+            self.scale_ = self.scale_.astype(np.result_type(*[scale for _, scale in stats]))
+            for g, (center, scale) in zip(self.groups, stats):
+                self.center_[g] = center
+                self.scale_[g] = scale
+        return self
+
+    def transform(self, x):
+        self._check_input(x)
+        return self._chunked_operation(x, 'transform')
+
+    def inverse_transform(self, x):
+        if self.scaler_type == 'normalize':
+            raise AttributeError("'normalize' scaler has no inverse_transform")
+        self._check_input(x)
+        return self._chunked_operation(x, 'inverse_transform')
+
+    def _check_input(self, x):
+        # same input validation as the sklearn scalers; like the sklearn identity path, 'identity' checks nothing
+        if self.scaler_type != 'identity' and x.shape[1] != self.center_.size:
+            raise ValueError('x has {} features, but the scaler was fitted with {} features'.format(
+                x.shape[1], self.center_.size))
+        self._check_finite(x)
+
+    def _check_finite(self, x):
+        if self.scaler_type == 'identity' or not np.issubdtype(x.dtype, np.floating):
+            return
+        if self.scaler_type == 'normalize' and np.isnan(x).any():
+            raise ValueError('Input contains NaN')
+        if np.isinf(x).any():
+            raise ValueError('Input contains infinity')
+
+    @staticmethod
+    def _fit_standardize(x):
+        # mirrors the two pass mean/variance of sklearn's StandardScaler
+        nan_mask = np.isnan(x)
+        sum_op = np.nansum if nan_mask.any() else np.sum
+        count = x.shape[0] - sum_op(nan_mask.astype(x.dtype), axis=0, dtype=np.float64)
+        mean = sum_op(x, axis=0, dtype=np.float64) / count
+        temp = x - mean
+        correction = sum_op(temp, axis=0, dtype=np.float64)
+        temp **= 2
+        var = sum_op(temp, axis=0, dtype=np.float64)
+        var -= correction ** 2 / count
+        with np.errstate(divide='ignore', invalid='ignore'):
+            var /= count
+        eps = np.finfo(np.float64).eps
+        constant_mask = var <= count * eps * var + (count * mean * eps) ** 2
+        scale = np.sqrt(var)
+        scale[constant_mask] = 1.0
+        return mean, scale
+
+    @staticmethod
+    def _fit_robust(x):
+        center = np.nanmedian(x, axis=0)
+        q_min, q_max = np.transpose([np.nanpercentile(x[:, i], (25.0, 75.0)) for i in range(x.shape[1])])
+        scale = q_max - q_min
+        scale[scale < 10 * np.finfo(scale.dtype).eps] = 1.0
+        return center, scale
+
+    def _chunked_operation(self, x, mode):
+        out = np.zeros(x.shape)
+        starts = range(0, x.shape[0], self.chunk_size)
+        if len(starts) <= 1 or self.n_jobs == 1:
+            for start in starts:
+                self._transform_chunk(x, out, start, mode)
+        else:
+            with ThreadPoolExecutor(max_workers=self.n_jobs) as pool:
+                list(pool.map(lambda start: self._transform_chunk(x, out, start, mode), starts))
+        return out
+
+    def _transform_chunk(self, x, out, start, mode):
+        rows = slice(start, start + self.chunk_size)
+        if self.scaler_type == 'identity':
+            if x.shape[1] == self.center_.size:
+                out[rows] = x[rows]
+            else:
+                # columns outside of the fitted groups are left at zero, as in the sklearn identity path
+                for g in self.groups:
+                    out[rows, g] = x[rows][:, g]
+            return
+        for g in self.groups:
+            chunk = _as_float(x[rows][:, g])
+            if self.scaler_type == 'normalize':
+                norms = np.sqrt(np.einsum('ij,ij->i', chunk, chunk))
+                norms[norms < 10 * np.finfo(norms.dtype).eps] = 1.0
+                chunk /= norms[:, np.newaxis]
+            elif mode == 'transform':
+                chunk -= self.center_[g]
+                chunk /= self.scale_[g]
+            else:
+                chunk *= self.scale_[g]
+                chunk += self.center_[g]
+            out[rows, g] = chunk
+
+
+def _as_float(x):
+    # cast a fancy-indexed copy to float the way sklearn's input validation does
+    dtype = x.dtype if x.dtype in [np.float16, np.float32, np.float64] else np.float64
+    return x.astype(dtype, copy=False)
+
+
 class ZamlScaler:
     """
     Class which helps transform and scale data.
@@ -96,19 +262,39 @@ class ZamlScaler:
     
     rounder : list, default=None
         list of rounding digits of continuous variables
+
+    engine : str, default='sklearn'
+        Scaling backend. Possible options: 'sklearn', 'numpy'. The 'numpy' engine
+        gives the same output with a single fit and chunked, multi-threaded transforms.
+
+    n_jobs : int, default=None
+        Number of threads used by the 'numpy' engine. If None, use the number of CPUs.
+
+    chunk_size : int, default=65536
+        Number of rows per task used by the 'numpy' engine.
     """
     
     
-    def __init__(self, cat_cols=[[]], scaler_type='identity', columns=[], rounder=None):
+    def __init__(self, cat_cols=[[]], scaler_type='identity', columns=[], rounder=None,
+                 engine='sklearn', n_jobs=None, chunk_size=65536):
+        assert engine in ENGINES, 'not a valid scaler engine'
         self.cat_cols = cat_cols
         self.cat_idx = flatten_list(cat_cols)
         self.columns = np.array(columns)
-        self.cat_scaler = get_scaler(scaler_type)
-        self.cont_scaler = get_scaler(scaler_type)
+        self.scaler_type = scaler_type
+        self.engine = engine
+        if engine == 'numpy':
+            self.scaler = NumpyScaler(scaler_type, n_jobs=n_jobs, chunk_size=chunk_size)
+        else:
+            self.cat_scaler = get_scaler(scaler_type)
+            self.cont_scaler = get_scaler(scaler_type)
         self.rounder = rounder
+        self._row_compiled = False
 
     @reshape
     def fit_transform(self, x):
+        # a refit invalidates the coefficients extracted by compile_row
+        self._row_compiled = False
         all_idx = np.arange(x.shape[1])
         self.cont_idx = np.setdiff1d(all_idx, self.cat_idx).astype(int)
         return self._scaler_operation(x, 'fit_transform')
@@ -149,8 +335,87 @@ class ZamlScaler:
             df = df.round(self.rounder)
         return df
 
+    def compile_row(self):
+        """
+        Prepare the low latency single-row mode of `transform_row`.
+
+        Extracts the fitted coefficients of the scalers into flat float64
+        arrays and allocates the row buffers, so that `transform_row` skips
+        the input checks and the scaler dispatch of `transform`. Must be
+        called after fitting, and again after any refit, which clears the
+        compiled coefficients.
+
+        Returns
+        -------
+        self : ZamlScaler
+        """
+        assert hasattr(self, 'cont_idx'), 'call fit_transform before compile_row'
+        cat_idx = self.cat_idx.astype(int)
+        n_features = cat_idx.size + self.cont_idx.size
+        center, scale = np.zeros(n_features), np.ones(n_features)
+        if self.engine == 'numpy':
+            groups = self.scaler.groups
+            center[:], scale[:] = self.scaler.center_, self.scaler.scale_
+        else:
+            groups = [idx for idx in [cat_idx, self.cont_idx] if idx.size > 0]
+            scalers = [scaler for idx, scaler in [(cat_idx, self.cat_scaler), (self.cont_idx, self.cont_scaler)]
+                       if idx.size > 0]
+            for idx, scaler in zip(groups, scalers):
+                if self.scaler_type == 'standardize':
+                    center[idx], scale[idx] = scaler.mean_, scaler.scale_
+                elif self.scaler_type == 'robust':
+                    center[idx], scale[idx] = scaler.center_, scaler.scale_
+
+        self._row_center, self._row_scale = center, scale
+        self._row_groups = groups
+        self._row_eps = 10 * np.finfo(np.float64).eps
+        self._row_buffer = np.empty(n_features)
+        self._row_compiled = True
+        return self
+
+    def transform_row(self, x, out=None):
+        """
+        Transform a single record with the coefficients extracted by `compile_row`.
+
+        Gives the same values as `transform` of the same float64 record,
+        without any input validation.
+
+        Parameters
+        ----------
+        x : numpy ndarray shape (D,)
+            Float64 record to transform.
+
+        out : numpy ndarray shape (D,), default=None
+            Float64 array receiving the result. If None, a buffer owned by the
+            scaler is used and overwritten by the next call, which is not thread-safe.
+
+        Returns
+        -------
+        out : numpy ndarray shape (D,)
+            Transformed record.
+        """
+        assert self._row_compiled, 'call compile_row after fitting the scaler to use transform_row'
+        if out is None:
+            out = self._row_buffer
+        if self.scaler_type in ['standardize', 'robust']:
+            np.subtract(x, self._row_center, out=out)
+            np.divide(out, self._row_scale, out=out)
+        elif self.scaler_type == 'normalize':
+            for idx in self._row_groups:
+                row = x[idx][np.newaxis]
+                # same row norm reduction as sklearn's Normalizer
+                norm = np.sqrt(np.einsum('ij,ij->i', row, row))[0]
+                out[idx] = row[0] / norm if norm >= self._row_eps else row[0]
+        else:
+            out[:] = x
+        return out
+
     def _scaler_operation(self, x, mode):
         assert mode in ['fit_transform', 'transform', 'inverse_transform'], 'not a valid scaler operation'
+        if self.engine == 'numpy':
+            if mode == 'fit_transform':
+                return self.scaler.fit_transform(x, [self.cat_idx, self.cont_idx])
+            return getattr(self.scaler, mode)(x)
         new_x = np.zeros(x.shape)
         if self.cat_idx.size > 0:
             new_x[:, self.cat_idx] = getattr(self.cat_scaler, mode)(x[:, self.cat_idx])
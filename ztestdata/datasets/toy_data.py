@@ -17,6 +17,10 @@ from sklearn.preprocessing import QuantileTransformer
 from .scalers import ZamlScaler
 
 
+BOSTON_CSV = os.path.abspath(os.path.join(os.path.dirname(__file__), 'boston_house.csv'))
+CENSUS_INCOME_DATA = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'fixtures', 'census_income.data'))
+
+
 def boston_data(scaler_type='identity'):
     """
     Load and preprocess boston house dataset.
@@ -32,8 +36,7 @@ def boston_data(scaler_type='identity'):
         Respectively: dataset with variables, target, scaler.
     """
     
-    csv = os.path.abspath(os.path.join(os.path.dirname(__file__), 'boston_house.csv'))
-    df = pd.read_csv(csv)
+    df = pd.read_csv(BOSTON_CSV)
     x = df.drop('target', axis=1)
     y = df['target']
     scaler = ZamlScaler(scaler_type=scaler_type)
@@ -59,8 +62,7 @@ def almost_boston(model_type='classification', force_disparity=True):
     """
     
     
-    csv = os.path.abspath(os.path.join(os.path.dirname(__file__), 'boston_house.csv'))
-    df = pd.read_csv(csv)
+    df = pd.read_csv(BOSTON_CSV)
     
     # create input data
     x = df.drop('target', axis=1)
@@ -86,8 +88,121 @@ def almost_boston(model_type='classification', force_disparity=True):
 
     return x, y, z_mask
 
+class CensusIncomePreprocessor:
+    """
+    Fitted feature encoding of the census income data.
+
+    Stores the one hot vocabulary and the standardization coefficients learned
+    by `fit`, so new records get exactly the training-time encoding. `transform`
+    works on DataFrames, `transform_records` encodes small batches of dict
+    records with plain numpy for low latency scoring.
+    """
+
+    # features; note that the 'target' and sentive attribute columns are dropped
+    drop_cols = ['target', 'race', 'gender']
+
+    def fit(self, df):
+        """
+        Fit the one hot vocabulary and the scaler.
+
+        Parameters
+        ----------
+        df : pandas DataFrame
+            Census income data, with the raw column names.
+
+        Returns
+        -------
+        self : CensusIncomePreprocessor
+        """
+        X = df.drop(columns=self.drop_cols, errors='ignore')
+        self.input_cols = list(X.columns)
+        self.numeric_cols = [col for col in X.columns if X[col].dtype != object]
+        X = self._fill_missing(X)
+        self.categories = {col: sorted(X[col].unique()) for col in X.columns if col not in self.numeric_cols}
+        X = pd.get_dummies(X, drop_first=True)
+        self.columns = list(X.columns)
+        self.scaler = StandardScaler().fit(X)
+
+        # lookup tables of the record path: value position of numeric columns, dummy position of categories
+        position = {col: i for i, col in enumerate(self.columns)}
+        self.numeric_idx = [(col, position[col]) for col in self.numeric_cols]
+        self.dummy_idx = {
+            col: {value: position['{}_{}'.format(col, value)] for value in values[1:]}
+            for col, values in self.categories.items()}
+        self.mean_ = self.scaler.mean_
+        self.scale_ = self.scaler.scale_
+        return self
+
+    def fit_transform(self, df):
+        return self.fit(df).transform(df)
+
+    def transform(self, df):
+        """
+        Encode and standardize a DataFrame of census income records.
+
+        Parameters
+        ----------
+        df : pandas DataFrame
+            Census income data, with the raw column names.
+
+        Returns
+        -------
+        X : pandas DataFrame
+            Standardized features with the training-time columns.
+        """
+        X = self._fill_missing(df.loc[:, self.input_cols])
+        for col, values in self.categories.items():
+            X[col] = pd.Categorical(X[col], categories=values)
+        X = pd.get_dummies(X, drop_first=True).reindex(columns=self.columns, fill_value=False)
+        return pd.DataFrame(self.scaler.transform(X), columns=X.columns, index=X.index)
+
+    def _fill_missing(self, X):
+        """Encode missing categories, NaN or '?', as 'Unknown'; numeric fields can't be missing."""
+        missing = X[self.numeric_cols].isna().any()
+        if missing.any():
+            raise ValueError('missing values in the numeric fields {}'.format(list(missing.index[missing])))
+        return X.replace('?', np.nan).fillna('Unknown')
+
+    def transform_records(self, records):
+        """
+        Encode and standardize census income records without pandas.
+
+        Parameters
+        ----------
+        records : dict or list of dict
+            Records keyed by the raw column names. Missing categories, None, NaN
+            or '?', are encoded as 'Unknown', unseen categories like the dropped
+            first category.
+
+        Returns
+        -------
+        X : numpy ndarray shape (N,D)
+            Standardized features, in the order of `columns`.
+        """
+        if isinstance(records, dict):
+            records = [records]
+        X = np.zeros((len(records), len(self.columns)))
+        for i, record in enumerate(records):
+            row = X[i]
+            for col, j in self.numeric_idx:
+                value = record.get(col)
+                if value is None or value != value:
+                    raise ValueError('record {} is missing the numeric field {}'.format(i, col))
+                row[j] = value
+            for col, dummies in self.dummy_idx.items():
+                value = record.get(col)
+                if value is None or value != value or value == '?':
+                    value = 'Unknown'
+                j = dummies.get(value)
+                if j is not None:
+                    row[j] = 1.
+        X -= self.mean_
+        X /= self.scale_
+        return X
+
+
 # https://archive.ics.uci.edu/ml/datasets/adult
-def census_income(path, synthetic_regression_target=False):
+def census_income(path, synthetic_regression_target=False, return_preprocessor=False):
     """
     Load and preprocess census income data.
     
@@ -98,11 +213,15 @@ def census_income(path, synthetic_regression_target=False):
     
     synthetic_regression_target : boolean, default=False
         If 'True' then the target is for the classification model.
+
+    return_preprocessor : boolean, default=False
+        If True, also return the fitted CensusIncomePreprocessor.
     
     Returns
     -------
     X, y, Z: tuple
         Respectively: dataset with variables, target, protected classes mask.
+        The fitted preprocessor is appended when return_preprocessor is True.
     """
 
     column_names = ['age', 'workclass', 'fnlwgt', 'education', 'education_num',
@@ -121,16 +240,9 @@ def census_income(path, synthetic_regression_target=False):
     # targets; 1 when someone makes over 50k , otherwise 0
     y = (input_data['target'] == '>50K').astype(int)
 
-    # features; note that the 'target' and sentive attribute columns are dropped
-    X = (input_data
-         .drop(columns=['target', 'race', 'gender'])
-         .fillna('Unknown')
-         .pipe(pd.get_dummies, drop_first=True))
-
-    # standardize the data
-    scaler = StandardScaler().fit(X)
-    scale_df = lambda df, scaler: pd.DataFrame(scaler.transform(df), columns=df.columns, index=df.index)
-    X = X.pipe(scale_df, scaler)
+    # one hot encode and standardize the features
+    preprocessor = CensusIncomePreprocessor()
+    X = preprocessor.fit_transform(input_data)
 
     if synthetic_regression_target:
         #fit a simple logistic regression
@@ -152,23 +264,150 @@ def census_income(path, synthetic_regression_target=False):
             ts[indx] = ts[indx]*10.0+56.0-1.0*zval+delta_ts # shift and scale
         ts[ts < 0.01] = 0.01 # clip negative values
         y = ts
+    if return_preprocessor:
+        return X, y, Z, preprocessor
     return X, y, Z
 
-def census_income_data(synthetic_regression_target=False):
+def census_income_data(synthetic_regression_target=False, return_preprocessor=False):
     """
     Load and preprocess census income data.
+
+    Reads .raw_data/census_income.data when present, otherwise the packaged
+    fixtures/census_income.data.
     
     Parameters
     ----------
     synthetic_regression_target : boolean, default=False
         If 'True' then the target is for the classification model.
+
+    return_preprocessor : boolean, default=False
+        If True, also return the fitted CensusIncomePreprocessor.
         
     Returns
     -------
     X, y, Z : tuple
         Respectively: dataset with variables, target, protected classes mask.
+        The fitted preprocessor is appended when return_preprocessor is True.
     """
     census_income_path = os.path.join(
         os.path.abspath(os.path.dirname(__file__)),
         '.raw_data/census_income.data')
-    return census_income(census_income_path,synthetic_regression_target)
+    if not os.path.exists(census_income_path):
+        census_income_path = CENSUS_INCOME_DATA
+    return census_income(census_income_path, synthetic_regression_target, return_preprocessor)
+
+
+def protected_data(N=1000000, race_threshold=0.0, gender_threshold=0.8, minority_threshold=0.8, age_threshold=62,
+                   missing_rate=0.3, race_missing_rate=0.06, gender_missing_rate=0.03, random_state=None):
+    """
+    Generate protected class proxy data with the schema of fixtures/protected_raw_sample_1.csv.
+
+    BISG race probabilities and name/age gender probabilities are drawn from
+    Dirichlet distributions concentrated around a latent class, and every
+    proxy label is derived from them with the given thresholds.
+
+    Parameters
+    ----------
+    N : int, default=1000000
+        Number of rows.
+
+    race_threshold : float, default=0.0
+        Minimum BISG probability for proxy_race to be the most likely race, otherwise 'Unknown'.
+
+    gender_threshold : float, default=0.8
+        Minimum first name and age probability for proxy_gender to be 'Female' or 'Male', otherwise 'Unknown'.
+
+    minority_threshold : float, default=0.8
+        Minimum prob_minority for proxy_minority to be 'high', otherwise 'low'.
+
+    age_threshold : int, default=62
+        Age from which proxy_age is protected.
+
+    missing_rate : float, default=0.3
+        Rate of rows without any proxy input.
+
+    race_missing_rate : float, default=0.06
+        Rate of the other rows without BISG probabilities.
+
+    gender_missing_rate : float, default=0.03
+        Rate of the other rows without gender probabilities.
+
+    random_state : int, default=None
+        Seed of the random generator.
+
+    Returns
+    -------
+    df : pandas DataFrame
+        Proxy data, one row per applicant.
+    """
+    rng = np.random.default_rng(random_state)
+    races = np.array(['Aian', 'Api', 'Black', 'Hispanic', 'Multi', 'White'])
+    race_base_rates = np.array([0.01, 0.05, 0.15, 0.15, 0.02, 0.62])
+
+    def dirichlet(alpha):
+        # rows of alpha are the concentrations; numpy's dirichlet only takes a single one
+        gamma = rng.standard_gamma(alpha)
+        return gamma / gamma.sum(axis=1, keepdims=True)
+
+    def labels(values, codes):
+        return np.take(np.array(values, dtype=object), codes)
+
+    missing = rng.random(N) < missing_rate
+    race_missing = missing | (rng.random(N) < race_missing_rate)
+    gender_missing = missing | (rng.random(N) < gender_missing_rate)
+
+    # age; 0 = below age_threshold, 1 = age_threshold and older, 2 = unknown
+    age = np.clip(np.round(rng.normal(42, 14, N)), 18, 88)
+    age[missing] = np.nan
+    age_code = np.where(missing, 2, (age >= age_threshold).astype(int))
+
+    # gender; first name probabilities, sharpened by age with a random power, which keeps their side of 0.5
+    female = rng.random(N) < 0.5
+    name_alpha = np.where(female[:, np.newaxis], [6., 1.], [1., 6.])
+    prob_female = dirichlet(name_alpha)[:, 0]
+    sharpness = 1 + rng.gamma(1., 0.25, N)
+    female_odds, male_odds = prob_female ** sharpness, (1 - prob_female) ** sharpness
+    prob_female_age = female_odds / (female_odds + male_odds)
+    prob_female[gender_missing] = np.nan
+    prob_female_age[gender_missing] = np.nan
+
+    # 0 = Female, 1 = Male, 2 = Unknown
+    gender_code = np.full(N, 2)
+    gender_code[prob_female_age >= gender_threshold] = 0
+    gender_code[1 - prob_female_age >= gender_threshold] = 1
+
+    # race; BISG probabilities concentrated on a latent race
+    race = rng.choice(len(races), size=N, p=race_base_rates)
+    race_alpha = np.full((N, len(races)), 0.2)
+    race_alpha[np.arange(N), race] += 3.
+    bisg = dirichlet(race_alpha)
+    bisg[race_missing] = np.nan
+
+    race_code = np.where(race_missing, len(races), np.argmax(np.nan_to_num(bisg), axis=1))
+    race_code[~race_missing & (np.nanmax(bisg, axis=1, initial=0.) < race_threshold)] = len(races)
+    prob_minority = np.where(race_missing, 0., 1 - bisg[:, -1])
+    prob_minority[missing] = np.nan
+
+    status = np.array(['Unprotected', 'Protected', 'Unknown'], dtype=object)
+    race_status = np.where(race_code == len(races), 2, (race_code != len(races) - 1).astype(int))
+    df = pd.DataFrame({
+        'age_actual': age,
+        'proxy_age': labels(['<{}'.format(age_threshold), '{}+'.format(age_threshold), 'Unknown'], age_code),
+        'proxy_age_status': status[age_code],
+        'prob_female': prob_female,
+        'prob_male': 1 - prob_female,
+        'prob_female_age': prob_female_age,
+        'prob_male_age': 1 - prob_female_age,
+        'proxy_gender': labels(['Female', 'Male', 'Unknown'], gender_code),
+        'proxy_gender_status': status[np.array([1, 0, 2])[gender_code]],
+        'proxy_gender_method': labels(['firstname_age', np.nan], missing.astype(int)),
+        'gender_threshold': np.where(missing, np.nan, gender_threshold)})
+    for i, name in enumerate(races):
+        df['bisg' + name] = bisg[:, i]
+    df['prob_minority'] = prob_minority
+    df['proxy_minority'] = labels(['low', 'high', np.nan], np.where(missing, 2, prob_minority >= minority_threshold))
+    df['proxy_race'] = labels(list(races) + ['Unknown'], race_code)
+    df['proxy_race_method'] = labels(['bisg', np.nan], missing.astype(int))
+    df['race_threshold'] = np.where(missing, np.nan, race_threshold)
+    df['proxy_race_status'] = status[race_status]
+    return df